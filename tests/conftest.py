@@ -0,0 +1,8 @@
+import os
+import sys
+
+# tutor.py refuses to import without API keys; tests never reach the network
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-tavily-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+import tutor
+
+
+class FakePlaceholder:
+    """Stands in for st.empty(), keeping only the latest markdown written to it."""
+
+    def __init__(self):
+        self.content = None
+
+    def markdown(self, body, unsafe_allow_html=False):
+        self.content = body
+
+    def empty(self):
+        self.content = None
+
+
+class FakePage:
+    def __init__(self):
+        self.slots = []
+
+    def empty(self):
+        slot = FakePlaceholder()
+        self.slots.append(slot)
+        return slot
+
+    def cards(self):
+        return [slot.content for slot in self.slots if slot.content is not None]
+
+
+@pytest.fixture
+def page(monkeypatch):
+    page = FakePage()
+    monkeypatch.setattr(tutor, "st", SimpleNamespace(empty=page.empty))
+    return page
+
+
+def card(week_num, content):
+    return f"<div class='learning-plan-section'><h3>Week {week_num}</h3>{content}</div>"
+
+
+def stream(plan, chunk_size=1):
+    """Feed a plan to render_plan_sections the way main() does while tokens arrive."""
+    start, pending = 0, None
+    for end in range(chunk_size, len(plan) + chunk_size, chunk_size):
+        start, pending = tutor.render_plan_sections(plan[:end], start, pending)
+    return tutor.render_plan_sections(plan, start, pending, final=True)
+
+
+def test_streaming_one_character_at_a_time_matches_one_shot(page):
+    plan = "Intro text\n## Week 1: Basics\n- a: b\n## Week 2: More\nstuff here\nWeek 3: End"
+
+    stream(plan)
+    streamed = page.cards()
+
+    page.slots.clear()
+    tutor.render_plan_sections(plan, 0, None, final=True)
+
+    assert streamed == page.cards() == [
+        card(1, "Basics\n- a: b\n##"),
+        card(2, "More\nstuff here"),
+        card(3, "End"),
+    ]
+
+
+def test_partial_header_keeps_section_live(page):
+    start, pending = tutor.render_plan_sections("Week 1: intro\nWee", 0, None)
+
+    assert start == 0
+    assert pending is not None
+    assert page.cards() == [card(1, "intro\nWee")]
+
+    plan = "Week 1: intro\nWeek 2: mo"
+    start, pending = tutor.render_plan_sections(plan, start, pending)
+
+    assert start == plan.index("Week 2")
+    assert page.cards() == [card(1, "intro"), card(2, "mo")]
+
+
+def test_empty_section_leaves_no_card(page):
+    stream("Week 1: Week 2: x")
+
+    assert page.cards() == [card(2, "x")]
+
+
+def test_final_renders_trailing_section_and_consumes_plan(page):
+    plan = "Week 1: a\nWeek 2: b"
+
+    start, pending = tutor.render_plan_sections(plan, 0, None)
+    assert start == plan.index("Week 2")
+    assert page.cards() == [card(1, "a"), card(2, "b")]
+
+    start, pending = tutor.render_plan_sections(plan, start, pending, final=True)
+    assert (start, pending) == (len(plan), None)
+    assert page.cards() == [card(1, "a"), card(2, "b")]
@@ -1,12 +1,23 @@
 import streamlit as st
-from typing import Optional, List
-from langchain.llms.base import LLM
-from groq import Groq
-from tavily import TavilyClient
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, List, Tuple
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+import queue
+import re
+import threading
 import time
 import os
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+# API SDKs are imported on first use to keep them off the cold-start path
+if TYPE_CHECKING:
+    import httpx
+    from groq import Groq
+    from tavily import TavilyClient
+
 # Load environment variables
 load_dotenv()
 
@@ -17,82 +28,222 @@ TAVILY_API_KEY = os.getenv('TAVILY_API_KEY')
 if not GROQ_API_KEY or not TAVILY_API_KEY:
     raise ValueError("Missing required API keys in environment variables")
 
-client = Groq(api_key=GROQ_API_KEY)
-tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
-
-# Initialize session state for caching
-if 'search_cache' not in st.session_state:
-    st.session_state.search_cache = {}
-
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def search_courses(topic: str) -> list:
-    """Search for online courses using Tavily with caching."""
-    # Check cache first
-    cache_key = f"search_{topic.lower()}"
-    if cache_key in st.session_state.search_cache:
-        return st.session_state.search_cache[cache_key]
-
+# Shows maintainer-only tools such as cache stats and clearing the shared caches
+DEBUG = os.getenv('EDUGENIE_DEBUG') == '1'
+
+@st.cache_resource
+def _http() -> "httpx.Client":
+    """Return a keep-alive HTTP connection pool that survives Streamlit reruns."""
+    import httpx
+    return httpx.Client(limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60))
+
+@st.cache_resource
+def get_groq() -> "Groq":
+    """Return a Groq client shared across reruns and sessions."""
+    from groq import Groq
+    return Groq(api_key=GROQ_API_KEY, http_client=_http())
+
+@st.cache_resource
+def get_tavily() -> "TavilyClient":
+    """Return a Tavily client shared across reruns and sessions."""
+    from tavily import TavilyClient
+    return TavilyClient(api_key=TAVILY_API_KEY)
+
+# Maps a domain fragment in a result URL to the platform it belongs to
+PLATFORM_DOMAINS = {
+    "udemy": "Udemy",
+    "coursera": "Coursera",
+    "youtube": "YouTube",
+    "youtu.be": "YouTube"
+}
+
+# Sites the combined course search is restricted to
+COURSE_DOMAINS = ["udemy.com", "coursera.org", "youtube.com"]
+
+# Matches each "Week N:" section of the learning plan up to the next header or end of text
+_WEEK_RE = re.compile(r"Week\s+(\d+)\s*:\s*(.*?)(?=Week\s+\d+\s*:|\Z)", re.DOTALL)
+
+# Titles mentioning a rating get a star badge
+_RATING_RE = re.compile(r"rating|stars", re.IGNORECASE)
+
+# Seconds a course search result stays cached
+SEARCH_TTL = 3600
+
+# Upper bound on how long one prewarm pass takes; its guard outlives the entries it fills by this much
+PREWARM_MAX_SECONDS = 300
+
+# Attempts made for a rate-limited Tavily search (waits 1s, 2s between them)
+SEARCH_RETRIES = 3
+
+# Per-thread flag set by the cached search body, which only runs on a cache miss
+_search_local = threading.local()
+
+@st.cache_resource
+def _get_stats() -> Tuple[dict, threading.Lock]:
+    """Return process-wide cache/latency counters (module globals reset on every rerun)."""
+    return {"search_hits": 0, "search_miss": 0, "search_ms": 0.0, "llm_ms": 0.0}, threading.Lock()
+
+def _record_stat(key: str, amount: float = 1) -> None:
+    """Add an amount to one of the profiling counters."""
+    stats, lock = _get_stats()
+    with lock:
+        stats[key] += amount
+
+@st.cache_resource
+def _get_inflight_searches() -> set:
+    """Return the normalized topics whose Tavily search is running (guarded by the stats lock)."""
+    return set()
+
+def _set_inflight(topic: str, running: bool) -> None:
+    """Mark a topic's search as started or finished."""
+    inflight = _get_inflight_searches()
+    _, lock = _get_stats()
+    with lock:
+        if running:
+            inflight.add(topic)
+        else:
+            inflight.discard(topic)
+
+def _platform_for_url(url: str) -> Optional[str]:
+    """Return the course platform a URL belongs to, or None if unrecognized."""
+    netloc = urlparse(url).netloc.lower()
+    for domain, platform in PLATFORM_DOMAINS.items():
+        if domain in netloc:
+            return platform
+    return None
+
+def _tavily_search(query: str, **kwargs) -> dict:
+    """Run a Tavily search, backing off exponentially when rate limited."""
+    from tavily import UsageLimitExceededError
+    for attempt in range(SEARCH_RETRIES):
+        try:
+            return get_tavily().search(query, **kwargs)
+        except UsageLimitExceededError:
+            if attempt == SEARCH_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+# Failures raise out of the cached body so they are never cached as empty results
+@st.cache_data(ttl=SEARCH_TTL, max_entries=256, show_spinner=False)  # Cache for 1 hour, bounded to 256 topics
+def _search_courses_cached(topic: str) -> list:
+    """Search Tavily for courses on a normalized topic."""
+    _search_local.miss = True
+    _set_inflight(topic, True)
     try:
-        # Search specifically for each platform
-        platforms = ["Udemy", "Coursera", "YouTube"]
-        all_results = []
-
-        for platform in platforms:
-            search_query = f"best {platform} courses for learning {topic}"
-            search_result = tavily_client.search(
-                search_query,
-                search_depth="advanced",
-                max_results=3
-            )
-
-            # Process results for each platform
-            for result in search_result['results']:
-                platform_tag = f"[{platform}]"
-                # Extract potential rating from title or description
-                rating = "N/A"
-                if "rating" in result['title'].lower() or "stars" in result['title'].lower():
-                    rating = "⭐⭐⭐⭐⭐"
-
-                all_results.append({
-                    'title': f"{platform_tag} {result['title']}",
-                    'url': result['url'],
-                    'description': result.get('content', 'No description available'),
-                    'platform': platform,
-                    'rating': rating
-                })
-
-        # Cache the results
-        st.session_state.search_cache[cache_key] = all_results
-        return all_results
-
+        return _fetch_courses(topic)
+    finally:
+        _set_inflight(topic, False)
+
+def _fetch_courses(topic: str) -> list:
+    """Query Tavily and build course cards for a topic."""
+    # One combined query covers every platform; Tavily restricts results to their domains
+    search_result = _tavily_search(
+        f"best online courses for learning {topic}",
+        search_depth="advanced",
+        max_results=9,
+        include_domains=COURSE_DOMAINS
+    )
+    all_results = []
+
+    for result in search_result['results']:
+        platform = _platform_for_url(result['url'])
+        if platform is None:
+            continue
+        platform_tag = f"[{platform}]"
+        # Extract potential rating from title or description
+        rating = "⭐⭐⭐⭐⭐" if _RATING_RE.search(result['title']) else "N/A"
+
+        all_results.append({
+            'title': f"{platform_tag} {result['title']}",
+            'url': result['url'],
+            'description': result.get('content', 'No description available'),
+            'platform': platform,
+            'rating': rating
+        })
+
+    return all_results
+
+def search_courses(topic: str) -> Tuple[list, Optional[str]]:
+    """Search for online courses using Tavily with caching.
+
+    Returns (results, error message) and never renders, so it is safe to run off the script thread.
+    """
+    from tavily import UsageLimitExceededError
+    t0 = time.perf_counter()
+    _search_local.miss = False
+    error = None
+    # Normalize before the cached call so case/whitespace variants share one entry
+    topic = " ".join(topic.lower().split())
+    # Streamlit makes callers of an in-flight key wait for it; those waits count as misses.
+    # A caller arriving just before the computing thread registers can still count as a hit.
+    _, lock = _get_stats()
+    with lock:
+        waited = topic in _get_inflight_searches()
+    try:
+        results = _search_courses_cached(topic)
+    except UsageLimitExceededError:
+        error = "Course search is rate limited right now. Please try again in a minute."
+        results = []
     except Exception as e:
-        st.error(f"Error searching for courses: {str(e)}")
-        time.sleep(1)  # Rate limit handling
-        return []
-
-# Modified Groq LLM Wrapper
-class GroqLLM(LLM):
-    model: str = "llama-3.3-70b-versatile"
-    temperature: int = 1
-    max_tokens: int = 5096
-
-    @property
-    def _llm_type(self) -> str:
-        return "groq"
-
-    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        error = f"Error searching for courses: {str(e)}"
+        results = []
+    _record_stat("search_miss" if _search_local.miss or waited else "search_hits")
+    _record_stat("search_ms", (time.perf_counter() - t0) * 1000)
+    return results, error
+
+# Topics whose course searches are cached ahead of the first request
+_POPULAR = ("python", "machine learning", "javascript", "react", "data science")
+
+# Expires only after every entry from the previous pass has, so the next pass refetches them
+@st.cache_resource(ttl=SEARCH_TTL + PREWARM_MAX_SECONDS, show_spinner=False)
+def _prewarm_search_cache() -> threading.Thread:
+    """Populate the search cache for popular topics in the background."""
+    def warm():
+        # Calls the cached body directly so prewarm misses stay out of the cache stats
+        for topic in _POPULAR:
+            try:
+                _search_courses_cached(topic)
+            except Exception:
+                pass  # A failed prewarm just leaves the topic to be fetched on demand
+
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
+
+# Models offered in the sidebar, fastest first
+GROQ_MODELS = ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"]
+
+# Output budget: scaled with course duration and capped to avoid over-generation
+MAX_TOKENS = 5096
+TOKENS_PER_WEEK = 512
+
+# Groq LLM Wrapper
+class GroqLLM:
+    def __init__(self, model: str = "llama-3.3-70b-versatile", temperature: int = 1, max_tokens: int = MAX_TOKENS):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.finish_reason: Optional[str] = None  # Set by stream(); "length" means cut off at max_tokens
+
+    def stream(self, prompt: str, stop: Optional[List[str]] = None) -> Iterator[str]:
+        """Yield completion tokens as they arrive from Groq."""
+        t0 = time.perf_counter()
         try:
-            completion = client.chat.completions.create(
+            stream = get_groq().chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
-                stop=stop
+                stop=stop,
+                stream=True
             )
-            return completion.choices[0].message.content
-        except Exception as e:
-            st.error(f"Error calling Groq API: {str(e)}")
-            raise
+            for chunk in stream:
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    self.finish_reason = choice.finish_reason
+                yield choice.delta.content or ""
+        finally:
+            _record_stat("llm_ms", (time.perf_counter() - t0) * 1000)
 
 TUTOR_PROMPT = """I want to learn {topic} from the world's best professional-YOU. You are the ultimate expert, the top authority in this field, and the best tutor anyone could ever learn from. No one can match your knowledge and expertise.
 
@@ -117,6 +268,104 @@ Format each week's plan clearly with headings and bullet points for easy readabi
 Let's begin creating the {duration}-week learning plan for {topic}."""
 
 
+@st.cache_data(ttl=24 * 60 * 60, max_entries=64, show_spinner=False)  # Cache for 1 day
+def get_learning_plan(
+    topic: str,
+    duration: int,
+    learning_style: str,
+    proficiency: str,
+    model: str,
+    _on_token: Optional[Callable[[str], None]] = None
+) -> Tuple[str, bool]:
+    """Generate the learning plan for a set of inputs, memoized across users.
+
+    Returns the plan and whether it was cut off at the token budget. On a miss each
+    token is also passed to _on_token, which is left out of the cache key.
+    """
+    groq_llm = GroqLLM(
+        model=model,
+        max_tokens=min(MAX_TOKENS, TOKENS_PER_WEEK * duration)
+    )
+    prompt = TUTOR_PROMPT.format(
+        topic=topic,
+        duration=duration,
+        learning_style=learning_style,
+        proficiency=proficiency
+    )
+    buf = []
+    for token in groq_llm.stream(prompt):
+        buf.append(token)
+        if _on_token is not None:
+            _on_token(token)
+    return "".join(buf), groq_llm.finish_reason == "length"
+
+_CSS = """
+<style>
+.stExpander {
+    border: 1px solid #e0e0e0;
+    border-radius: 5px;
+    margin-bottom: 10px;
+}
+.learning-plan-section {
+    padding: 20px;
+    border: 1px solid #e0e0e0;
+    border-radius: 5px;
+    margin-bottom: 20px;
+    background-color: #f9f9f9; /* Light grey background */
+}
+.learning-plan-section h3 {
+    color: #333; /* Dark heading color */
+}
+.learning-plan-section ul {
+    list-style-type: disc;
+    margin-left: 20px;
+}
+.learning-plan-section li {
+    margin-bottom: 5px;
+}
+</style>
+"""
+
+def run_in_background(fn: Callable, *args) -> Future:
+    """Run a function on a worker thread attached to the current Streamlit script run."""
+    ctx = get_script_run_ctx()
+
+    def target():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(target)
+    executor.shutdown(wait=False)  # Worker exits once the submitted call finishes
+    return future
+
+def render_plan_sections(
+    plan: str,
+    start: int,
+    pending: Optional[DeltaGenerator],
+    final: bool = False
+) -> Tuple[int, Optional[DeltaGenerator]]:
+    """Render the "Week N:" sections of a possibly still-streaming plan from offset start.
+
+    A section followed by another week header is complete and rendered once; the
+    trailing section is kept live in the pending placeholder until final. Returns
+    the offset and placeholder of the section that may still grow.
+    """
+    for match in _WEEK_RE.finditer(plan, start): # Assuming LLM formats with "Week 1:", "Week 2:", etc.
+        complete = final or match.end() < len(plan)
+        week_num, week_content = match.group(1), match.group(2).strip()
+        if week_content: # Avoid empty sections
+            if pending is None:
+                pending = st.empty()
+            pending.markdown(f"<div class='learning-plan-section'><h3>Week {week_num}</h3>{week_content}</div>", unsafe_allow_html=True)
+        elif pending is not None:
+            pending.empty() # Content shrank to nothing once the next header arrived
+        if not complete:
+            return match.start(), pending
+        pending = None
+        start = match.end()
+    return start, pending
+
 def display_course_card(course):
     """Display a formatted course card."""
     with st.expander(course['title']):
@@ -131,109 +380,96 @@ def display_course_card(course):
 
 def main():
     st.set_page_config(page_title="AI Learning Assistant", page_icon="🎓")
+    _prewarm_search_cache()
 
     # Add custom CSS
-    st.markdown("""
-        <style>
-        .stExpander {
-            border: 1px solid #e0e0e0;
-            border-radius: 5px;
-            margin-bottom: 10px;
-        }
-        .learning-plan-section {
-            padding: 20px;
-            border: 1px solid #e0e0e0;
-            border-radius: 5px;
-            margin-bottom: 20px;
-            background-color: #f9f9f9; /* Light grey background */
-        }
-        .learning-plan-section h3 {
-            color: #333; /* Dark heading color */
-        }
-        .learning-plan-section ul {
-            list-style-type: disc;
-            margin-left: 20px;
-        }
-        .learning-plan-section li {
-            margin-bottom: 5px;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_CSS, unsafe_allow_html=True)
 
     st.title("EduGenie 🎓")
     st.write("I'll create a personalized lesson plan with exercises and find relevant courses for you!")
 
-    # Topic Input
-    topic = st.text_input("What topic would you like to learn?")
-
-    # Course Parameters
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        duration = st.selectbox(
-            "Course Duration",
-            options=[1, 2, 4, 8, 12, 16, 24],
-            format_func=lambda x: f"{x} weeks"
-        )
-
-    with col2:
-        learning_style = st.selectbox(
-            "Learning Style",
-            options=[
-                "Visual",
-                "Auditory",
-                "Reading/Writing",
-                "Mixed"
-            ]
-        )
-
-    with col3:
-        proficiency = st.selectbox(
-            "Current Proficiency",
-            options=[
-                "Complete Beginner",
-                "Some Basic Knowledge",
-                "Intermediate",
-                "Advanced"
-            ]
-        )
-
-    # Generate button
-    generate_button = st.button("Generate Learning Plan 🚀", type="primary")
-
-    if topic and generate_button:  # Only process when button is clicked
+    # Smaller models generate much faster; output length is capped per week below
+    model = st.sidebar.selectbox(
+        "Model",
+        options=GROQ_MODELS
+    )
+
+    # Batch input changes so the script only reruns on submit
+    with st.form("edu_form"):
+        # Topic Input
+        topic = st.text_input("What topic would you like to learn?")
+
+        # Course Parameters
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            duration = st.selectbox(
+                "Course Duration",
+                options=[1, 2, 4, 8, 12, 16, 24],
+                format_func=lambda x: f"{x} weeks"
+            )
+
+        with col2:
+            learning_style = st.selectbox(
+                "Learning Style",
+                options=[
+                    "Visual",
+                    "Auditory",
+                    "Reading/Writing",
+                    "Mixed"
+                ]
+            )
+
+        with col3:
+            proficiency = st.selectbox(
+                "Current Proficiency",
+                options=[
+                    "Complete Beginner",
+                    "Some Basic Knowledge",
+                    "Intermediate",
+                    "Advanced"
+                ]
+            )
+
+        # Generate button
+        submitted = st.form_submit_button("Generate Learning Plan 🚀", type="primary")
+
+    if submitted and topic:  # Only process when the form is submitted
         with st.spinner("Creating your personalized learning plan..."):
             try:
+                # Start the course search now so it overlaps with LLM generation
+                courses_future = run_in_background(search_courses, topic)
+
                 # Create progress bar
                 progress_bar = st.progress(0)
 
                 # Get learning plan
                 progress_bar.progress(30)
-                groq_llm = GroqLLM()
-                prompt = TUTOR_PROMPT.format(
-                    topic=topic,
-                    duration=duration,
-                    learning_style=learning_style,
-                    proficiency=proficiency
+                # Render each week as soon as it is complete; cache hits return at once
+                heading = st.empty()  # Filled once the plan starts rendering
+                heading_shown = False
+                tokens = queue.Queue()
+                plan_future = run_in_background(
+                    get_learning_plan, topic, duration, learning_style, proficiency, model, tokens.put
                 )
-                learning_plan = groq_llm._call(prompt)
-
-                progress_bar.progress(60)
-
-                # Display learning plan in a more structured format
-                st.success("Your Personalized Learning Plan")
-
-                # --- Improved Learning Plan Display ---
-                learning_plan_sections = learning_plan.split("Week ") # Assuming LLM formats with "Week 1:", "Week 2:", etc.
-
-                for section in learning_plan_sections[1:]: # Skip the first empty split
-                    week_num = section.split(":")[0] # Extract week number
-                    week_content = ":".join(section.split(":")[1:]).strip() # Get content after week number
-                    if week_content: # Avoid empty sections
-                        with st.container():
-                            st.markdown(f"<div class='learning-plan-section'><h3>Week {week_num}</h3>{week_content}</div>", unsafe_allow_html=True)
-                # --- End Improved Learning Plan Display ---
-
+                buf = ""
+                scan_from, pending = 0, None
+                while not (plan_future.done() and tokens.empty()):
+                    try:
+                        buf += tokens.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    scan_from, pending = render_plan_sections(buf, scan_from, pending)
+                    if not heading_shown and pending is not None:  # A week card is on the page
+                        heading.success("Your Personalized Learning Plan")
+                        heading_shown = True
+                learning_plan, truncated = plan_future.result()
+                render_plan_sections(learning_plan, scan_from, pending, final=True)
+                # Cache hits and sections completed in a single chunk never went through the loop above
+                if not heading_shown and any(match.group(2).strip() for match in _WEEK_RE.finditer(learning_plan)):
+                    heading.success("Your Personalized Learning Plan")
+                if truncated:
+                    st.warning("The plan reached its length limit, so the last week may be cut off.")
 
                 progress_bar.progress(80)
 
@@ -241,11 +477,16 @@ def main():
                 st.write("---")
                 st.subheader("📚 Recommended Online Courses")
 
-                courses = search_courses(topic)
-                if courses:
-                    # Group courses by platform
+                courses, search_error = courses_future.result()
+                if search_error:
+                    st.error(search_error)
+                elif courses:
+                    # Group courses by platform in a single pass
+                    groups = defaultdict(list)
+                    for course in courses:
+                        groups[course['platform']].append(course)
                     for platform in ["Udemy", "Coursera", "YouTube"]:
-                        platform_courses = [c for c in courses if c['platform'] == platform]
+                        platform_courses = groups.get(platform)
                         if platform_courses:
                             st.markdown(f"### {platform} Courses")
                             for course in platform_courses:
@@ -265,5 +506,16 @@ def main():
             except Exception as e:
                 st.error(f"Error creating learning plan: {str(e)}")
 
+    # Profiling counters for tuning cache ttl/max_entries
+    if DEBUG:
+        stats, lock = _get_stats()
+        with lock:
+            snapshot = dict(stats)
+        st.sidebar.expander("Cache stats").json(snapshot)
+    if DEBUG and st.sidebar.button("Clear Cache"):
+        st.cache_data.clear()  # Drops cached course searches and learning plans for every user
+        _prewarm_search_cache.clear()  # Re-warm popular topics on the next run
+        st.sidebar.success("Cache cleared")
+
 if __name__ == "__main__":
     main()